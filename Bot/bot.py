@@ -12,6 +12,8 @@ from telegram.ext import (
 from Bot import handlers
 from Core.config import Settings
 from Core.logger import get_logger
+from Downloader.http import AioHttpClient, Aria2Client
+from TeleDrive.td_client import TeleDriveClient
 
 logger = get_logger("BOT")
 
@@ -24,6 +26,16 @@ class StorageChatFilter(filters.UpdateFilter):
 storage_chat_filter = StorageChatFilter()
 
 
+async def post_init(_):
+    await TeleDriveClient.create_session()
+
+
+async def post_shutdown(_):
+    await AioHttpClient.aclose()
+    await Aria2Client.aclose()
+    await TeleDriveClient.aclose()
+
+
 def run():
     app = ApplicationBuilder().token(Settings.BOT_KEY)
     prx_url = Settings.HTTP_PROXY
@@ -33,6 +45,8 @@ def run():
     app = app.read_timeout(Settings.BOT_READ_TIMEOUT)
     app = app.write_timeout(Settings.BOT_WRITE_TIMEOUT)
     app = app.pool_timeout(Settings.BOT_POOL_TIMEOUT)
+    app = app.post_init(post_init)
+    app = app.post_shutdown(post_shutdown)
     app = app.build()
     app.add_handler(
         MessageHandler(
@@ -350,7 +350,9 @@ class UrlQueryHandle(BaseQueryHandler):
             f"image request: {self.file_name}({self.media_report.hash})",
         )
         self.loading_bar.bar = False
-        with tempfile.TemporaryDirectory() as dir_:
+        with tempfile.TemporaryDirectory(
+            dir=Settings.DOWNLOADER_ARIA2_DIR
+        ) as dir_:
             tasks_ = [
                 x.download(Path(dir_) / f"{c_}{x.extension}")
                 for c_, x in enumerate(self.media_report.image)
@@ -375,7 +377,9 @@ class UrlQueryHandle(BaseQueryHandler):
             f"video request: {self.file_name}({self.media_report.hash})",
         )
         self.loading_bar.bar = True
-        with tempfile.TemporaryDirectory() as dir_:
+        with tempfile.TemporaryDirectory(
+            dir=Settings.DOWNLOADER_ARIA2_DIR
+        ) as dir_:
             src_ = self.media_report.video[self.source_index]
             filename = f"{self.media_report.title}{'.' + src_.title if src_.title else ''}{src_.extension}"
             file_path = Path(dir_) / filename
@@ -28,8 +28,12 @@ class SettingsCls(BaseSettings):
     DOWNLOADER_ARIA2_URL: AnyUrl
     DOWNLOADER_ARIA2_TOKEN: str
     DOWNLOADER_ARIA2_DIR: Path = "storage/aria2/downloads"
+    DOWNLOADER_ARIA2_FILE_ALLOCATION: Optional[str] = None
     DOWNLOADER_SAVE_PATH: Path = "storage/downloader"
     DOWNLOADER_IO_CHUNK: int = 1e6
+    DOWNLOADER_POLL_BACKOFF_MIN: float = 0.05
+    DOWNLOADER_POLL_BACKOFF_MAX: float = 2
+    DOWNLOADER_POLL_BACKOFF_BASE: float = 1.3
     HTTP_PROXY: Optional[AnyHttpUrl] = None
     LOG_LEVEL: str = "WARNING"
 
@@ -61,24 +61,27 @@ def call_log(
 ):
     def _decorator(func):
         func_logger_kwarg = "_function_logger"
+        fn_name = func.__str__().split(" ", 2)[1]
+        pass_logger = (
+            func_logger_kwarg in inspect.signature(func).parameters.keys()
+        )
 
         def _prep():
             _uid = uuid.uuid4().hex
-            fn_name = func.__str__().split(" ", 2)[1]
             _fn_logger = logger.getChild(f"{fn_name}({_uid})")
             return _uid, _fn_logger
 
         def _pre_call(_fn_logger, *args, **kwargs):
             _fn_logger.log(enter_level, "enter")
-            _fn_logger.log(args_level, f"args={args} kwargs={kwargs}")
+            _fn_logger.log(args_level, "args=%s kwargs=%s", args, kwargs)
 
         def _post_call(_fn_logger, _ret):
-            _fn_logger.log(ret_level, f"return {_ret}")
+            _fn_logger.log(ret_level, "return %s", _ret)
             _fn_logger.log(exit_level, "exit")
 
         def _logger_as_arg(_fn_logger):
             _ret = {}
-            if func_logger_kwarg in inspect.signature(func).parameters.keys():
+            if pass_logger:
                 _ret[func_logger_kwarg] = _fn_logger
             return _ret
 
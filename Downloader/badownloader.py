@@ -1,3 +1,4 @@
+import asyncio
 import json
 import random
 import re
@@ -94,8 +95,7 @@ class BAClient(metaclass=Singleton):
                     size=src_["size"],
                 )
             ]
-        [await x.make_ready() for x in image]
-        [await x.make_ready() for x in video]
+        await asyncio.gather(*[x.make_ready() for x in image + video])
         return BAClientResult(title=title, image=image, video=video)
 
     @property
@@ -2,10 +2,9 @@ import asyncio
 import inspect
 from asyncio import sleep, gather
 from contextlib import asynccontextmanager
-from functools import partialmethod, cached_property
 from pathlib import Path
+from time import monotonic
 from typing import (
-    Callable,
     Optional,
     List,
     Union,
@@ -33,60 +32,75 @@ class AioHttpClient:
     HEAD_KEY = "head"
     POST_KEY = "post"
     proxy = Settings.HTTP_PROXY
-
-    class _AsyncRequestCall:
-        def __init__(self, session, function, *args, **kwargs):
-            self.session = session
-            self.function = function
-            self.call_args = args
-            self.call_kwargs = kwargs
-
-        @call_log(logger)
-        async def __aenter__(self):
-            self.req_obj = await self()
-            return self.req_obj
-
-        @call_log(logger)
-        async def __aexit__(self, exc_type, exc_val, exc_tb):
-            self.req_obj.release()
-            await self.session.close()
-
-        @call_log(logger)
-        async def __call__(self):
-            resp = await self.function(*self.call_args, **self.call_kwargs)
-            return resp
+    _session: Optional[aiohttp.ClientSession] = None
 
     @property
     def session(self):
-        connector = aiohttp.TCPConnector(
-            limit_per_host=Settings.DOWNLOADER_THROTTLING
-        )
-        return aiohttp.ClientSession(connector=connector)
+        return self._get_session()
+
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        if cls._session is None or cls._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=Settings.DOWNLOADER_THROTTLING,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True,
+            )
+            cls._session = aiohttp.ClientSession(connector=connector)
+        return cls._session
 
-    def _get_call_fn(self, session, fn):
-        _call_map = {
-            self.GET_KEY: session.get,
-            self.HEAD_KEY: session.head,
-            self.POST_KEY: session.post,
-        }
-        cl_ = _call_map[fn]
-        return cl_
+    @classmethod
+    async def aclose(cls):
+        if cls._session is not None:
+            await cls._session.close()
+            cls._session = None
 
-    @call_log(logger)
-    def _call_async(
+    @asynccontextmanager
+    async def get(
         self,
-        fn,
         *_,
         url,
         session: Optional[aiohttp.ClientSession] = None,
         **kwargs,
-    ):
+    ) -> AsyncIterator[ClientResponse]:
         session = session or self.session
-        fn = self._get_call_fn(session, fn)
-        req = self._AsyncRequestCall(
-            session, fn, url=url, proxy=self.proxy, **kwargs
-        )
-        return req
+        async with session.get(url, proxy=self.proxy, **kwargs) as resp:
+            yield resp
+
+    @asynccontextmanager
+    async def head(
+        self,
+        *_,
+        url,
+        session: Optional[aiohttp.ClientSession] = None,
+        **kwargs,
+    ) -> AsyncIterator[ClientResponse]:
+        session = session or self.session
+        async with session.head(url, proxy=self.proxy, **kwargs) as resp:
+            yield resp
+
+    @asynccontextmanager
+    async def post(
+        self,
+        *_,
+        url,
+        session: Optional[aiohttp.ClientSession] = None,
+        **kwargs,
+    ) -> AsyncIterator[ClientResponse]:
+        session = session or self.session
+        async with session.post(url, proxy=self.proxy, **kwargs) as resp:
+            yield resp
+
+    def get_many(
+        self, **kwargs
+    ) -> AsyncGenerator[Tuple[int, ClientResponse], None]:
+        return self._call_many_async(self.GET_KEY, **kwargs)
+
+    def head_many(
+        self, **kwargs
+    ) -> AsyncGenerator[Tuple[int, ClientResponse], None]:
+        return self._call_many_async(self.HEAD_KEY, **kwargs)
 
     @call_log(logger)
     async def _call_many_async(
@@ -98,78 +112,93 @@ class AioHttpClient:
         headers: Union[dict, List[dict]] = None,
         **kwargs,
     ):
+        sem_ = asyncio.Semaphore(Settings.DOWNLOADER_THROTTLING)
+
         async def _call(counter, **kwargs_):
-            return counter, await self._call_async(**kwargs_)()
+            async with sem_:
+                return counter, await call_fn(proxy=self.proxy, **kwargs_)
 
         headers = headers or kwargs.pop("headers", None)
         session = session or self.session
+        call_fn = getattr(session, fn)
         if headers:
             if isinstance(headers, dict):
                 headers = [headers] * len(urls)
         else:
             headers = [None] * len(urls)
         tasks = [
-            _call(
-                counter=c_,
-                fn=fn,
-                url=u_,
-                session=session,
-                headers=h_,
-                **kwargs,
+            asyncio.ensure_future(
+                _call(counter=c_, url=u_, headers=h_, **kwargs)
             )
             for c_, (u_, h_) in enumerate(zip(urls, headers))
         ]
-        for t_ in asyncio.as_completed(tasks):
-            res = await t_
-            yield res
-        await session.close()
-
-    get: Callable[..., ClientResponse] = partialmethod(_call_async, fn=GET_KEY)
-    head: Callable[..., ClientResponse] = partialmethod(
-        _call_async, fn=HEAD_KEY
-    )
-    post: Callable[..., ClientResponse] = partialmethod(
-        _call_async, fn=POST_KEY
-    )
-    get_many: Callable[
-        ..., AsyncGenerator[ClientResponse, None]
-    ] = partialmethod(_call_many_async, fn=GET_KEY)
-    head_many: Callable[
-        ..., AsyncGenerator[ClientResponse, None]
-    ] = partialmethod(_call_many_async, fn=HEAD_KEY)
+        try:
+            for t_ in asyncio.as_completed(tasks):
+                res = await t_
+                try:
+                    yield res
+                finally:
+                    res[1].release()
+        finally:
+            for t_ in tasks:
+                t_.add_done_callback(self._release_result)
+                t_.cancel()
+
+    @staticmethod
+    def _release_result(task: asyncio.Future):
+        if not task.cancelled() and task.exception() is None:
+            task.result()[1].release()
 
 
 class Aria2Client:
     aria2_uri = Settings.DOWNLOADER_ARIA2_URL
     aria2_token = Settings.DOWNLOADER_ARIA2_TOKEN
+    file_allocation = Settings.DOWNLOADER_ARIA2_FILE_ALLOCATION
+    poll_backoff_min = Settings.DOWNLOADER_POLL_BACKOFF_MIN
+    poll_backoff_max = Settings.DOWNLOADER_POLL_BACKOFF_MAX
+    poll_backoff_base = Settings.DOWNLOADER_POLL_BACKOFF_BASE
+    POLL_NEAR_DONE_PROGRESS = 0.9
+    POLL_NEAR_DONE_DELAY = 0.2
+    UPDATE_INTERVAL = 1
+    _sess: Optional[aioaria2.Aria2HttpClient] = None
+    _dl_path: Optional[str] = None
 
     @asynccontextmanager
     async def session(self):
-        sess_ = aioaria2.Aria2HttpClient(
-            self.aria2_uri, token=self.aria2_token
-        )
-        try:
-            yield sess_
-        finally:
-            await sess_.close()
+        yield self._get_session()
 
-    @cached_property
-    def aria2_download_path(self):
-        async def _fn():
-            async with self.session() as sess_:
-                return (await sess_.getGlobalOption())["dir"]
+    @classmethod
+    def _get_session(cls) -> aioaria2.Aria2HttpClient:
+        if cls._sess is None or cls._sess.client_session.closed:
+            cls._sess = aioaria2.Aria2HttpClient(
+                cls.aria2_uri, token=cls.aria2_token
+            )
+        return cls._sess
 
-        result = asyncio.get_event_loop().run_until_complete(_fn())
-        return result
+    @classmethod
+    async def aclose(cls):
+        if cls._sess is not None:
+            await cls._sess.close()
+            cls._sess = None
+
+    async def aria2_download_path(self):
+        if self._dl_path is None:
+            async with self.session() as sess_:
+                Aria2Client._dl_path = (await sess_.getGlobalOption())["dir"]
+        return self._dl_path
 
     # ===========================================================
     async def download_many(
         self, urls: List[str], save_dir: Path = None, **kwargs
     ):
         save_dir = (
-            self.path2aria(save_dir) if save_dir else self.aria2_download_path
+            await self.path2aria(save_dir)
+            if save_dir
+            else await self.aria2_download_path()
         )
         kwargs["dir"] = str(save_dir)
+        if self.file_allocation:
+            kwargs.setdefault("file-allocation", self.file_allocation)
         download_list = await self._add_downloads(urls, **kwargs)
         return download_list
 
@@ -218,44 +247,88 @@ class Aria2Client:
             yield dl_[0]
 
     async def await_complete(self, gids: Tuple[AriaGID], update_fn=None):
+        delay = self.poll_backoff_min
+        updated_at = 0
+        remaining = tuple(gids)
+        done_ = []
         while True:
-            stat = await self.status(gids, ["status"])
-            is_complete = True
-            for c_, s_ in enumerate(stat):
+            stat = await self.status(
+                remaining, ["status", "totalLength", "completedLength"]
+            )
+            for g_, s_ in zip(remaining, stat):
                 if s_["status"] == "error":
                     err_ = (
-                        await self.status(
-                            (gids[c_],), ["errorCode", "errorMessage"]
-                        )
+                        await self.status((g_,), ["errorCode", "errorMessage"])
                     )[0]
                     raise Aria2Error(err_["errorCode"], err_["errorMessage"])
-                is_complete &= s_["status"] == "complete"
-            if is_complete:
+            done_ += [x for x in stat if x["status"] == "complete"]
+            pending_ = [
+                (g_, s_)
+                for g_, s_ in zip(remaining, stat)
+                if s_["status"] != "complete"
+            ]
+            if not pending_:
                 break
-            if update_fn:
+            remaining = tuple(g_ for g_, _ in pending_)
+            if update_fn and monotonic() - updated_at >= self.UPDATE_INTERVAL:
+                updated_at = monotonic()
                 tmp_ = update_fn(gids)
                 if inspect.iscoroutinefunction(update_fn):
                     await tmp_
-            await sleep(1)
+            await sleep(delay)
+            delay = min(delay * self.poll_backoff_base, self.poll_backoff_max)
+            progress_ = self._progress(done_ + [s_ for _, s_ in pending_])
+            if progress_ >= self.POLL_NEAR_DONE_PROGRESS:
+                delay = min(delay, self.POLL_NEAR_DONE_DELAY)
 
     async def status(self, gids: Tuple[AriaGID], keys=None):
+        if not gids:
+            return []
+        calls_ = [
+            {
+                "methodName": "aria2.tellStatus",
+                "params": [x, keys] if keys else [x],
+            }
+            for x in gids
+        ]
         async with self.session() as sess_:
-            tasks = [sess_.tellStatus(x, keys) for x in gids]
-            # noinspection PyTypeChecker
-            result = await asyncio.gather(*tasks)
-        result: List[dict]
+            result = await sess_.multicall(calls_)
+        result: List[dict] = [self._multicall_result(x) for x in result]
         return result
 
-    def path2aria(self, path: Path):
+    @staticmethod
+    def _multicall_result(res):
+        # a successful call is wrapped in a single-item list, a failed one
+        # is returned as a fault struct
+        if isinstance(res, dict):
+            raise Aria2Error(res.get("code"), res.get("message"))
+        return res[0]
+
+    @staticmethod
+    def _progress(statuses: List[dict]) -> float:
+        total = sum([float(x["totalLength"]) for x in statuses])
+        if total <= 0:
+            return 0
+        return sum([float(x["completedLength"]) for x in statuses]) / total
+
+    async def path2aria(self, path: Path):
         if Settings.DOWNLOADER_ARIA2_DIR in path.parents:
             path = path.relative_to(Settings.DOWNLOADER_ARIA2_DIR)
-        return self.aria2_download_path / path
+        return (await self.aria2_download_path()) / path
 
     def callback_factory(self, fn, use_length=False):
+        done_ = {}
+
         async def _fn(gids: Tuple[AriaGID]):
-            statuses = await self.status(
-                gids, ["totalLength", "completedLength", "status"]
+            pending_ = tuple(x for x in gids if x not in done_)
+            stat_ = await self.status(
+                pending_, ["totalLength", "completedLength", "status"]
             )
+            stat_ = dict(zip(pending_, stat_))
+            done_.update(
+                {k: v for k, v in stat_.items() if v["status"] == "complete"}
+            )
+            statuses = [stat_.get(x) or done_[x] for x in gids]
             if use_length:
                 total = sum([float(x["totalLength"]) for x in statuses])
                 completed = sum(
@@ -277,8 +350,9 @@ class Aria2Client:
     async def _add_downloads(
         self, urls: List[str], **kwargs
     ) -> Tuple[AriaGID]:
+        sem_ = asyncio.Semaphore(Settings.DOWNLOADER_THROTTLING)
         async with self.session() as sess_:
-            tasks_ = [self._download(u_, sess_, **kwargs) for u_ in urls]
+            tasks_ = [self._download(u_, sess_, sem_, **kwargs) for u_ in urls]
             # noinspection PyTypeChecker
             result = await gather(*tasks_, return_exceptions=False)
         result: Tuple[AriaGID]
@@ -286,7 +360,11 @@ class Aria2Client:
 
     @staticmethod
     async def _download(
-        url: str, sess: aioaria2.Aria2HttpClient, **kwargs
+        url: str,
+        sess: aioaria2.Aria2HttpClient,
+        sem: asyncio.Semaphore,
+        **kwargs,
     ) -> AriaGID:
         url = [url]
-        return await sess.addUri(uris=url, options=kwargs)
+        async with sem:
+            return await sess.addUri(uris=url, options=kwargs)
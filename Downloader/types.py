@@ -1,10 +1,13 @@
-import random
+import asyncio
+import math
+import pickle
+import shutil
 import tempfile
 import time
 from abc import abstractmethod, ABCMeta
 from pathlib import Path
 from statistics import mean
-from typing import List, Union, Dict, ClassVar
+from typing import List, Union, Dict
 from uuid import uuid4
 
 import aiofiles
@@ -17,7 +20,6 @@ from Core.logger import get_logger
 from Downloader.http import Aria2Client, AioHttpClient
 from utils.helpers import size_hr, async_move_file
 from utils.types import PathOrStr, pathorstr_2_path
-import dill
 
 logger = get_logger(__name__)
 
@@ -28,6 +30,7 @@ class BaseMedia(BaseModel, metaclass=ABCMeta):
     extension: str = ""
     size: int = -1
     _ready = PrivateAttr(False)
+    _pending: Dict[str, asyncio.Future] = PrivateAttr(default_factory=dict)
 
     # ===========================================================
     async def download(self, save_path: PathOrStr, update_fn=None):
@@ -43,13 +46,17 @@ class BaseMedia(BaseModel, metaclass=ABCMeta):
                 download_dir=download_dir,
                 update_fn=update_fn,
             )
-            for f_ in download_dir.iterdir():
-                if f_.is_file():
-                    f_.unlink()
 
     async def make_ready(self):
         self._ready = True
 
+    async def _call_once(self, key: str, fn):
+        if key not in self._pending:
+            task_ = asyncio.ensure_future(fn())
+            task_.add_done_callback(lambda _: self._pending.pop(key, None))
+            self._pending[key] = task_
+        return await asyncio.shield(self._pending[key])
+
     @property
     def size_hr(self) -> str:
         return size_hr(self.size) if self.size else "unknown size"
@@ -96,60 +103,117 @@ class GenericMedia(BaseMedia):
 
     async def make_ready(self):
         if self.size < 0:
-            async with AioHttpClient().head(
-                url=self.url, allow_redirects=True
-            ) as req_:
-                self.size = req_.content_length
+            self.size = await self._call_once("head", self._get_head_size)
         return await super().make_ready()
 
+    async def _get_head_size(self):
+        async with AioHttpClient().head(
+            url=self.url, allow_redirects=True
+        ) as req_:
+            return req_.content_length
+
 
 class M3U8Media(BaseMedia):
-    SIZE_ESTIMATE_SAMPLE: ClassVar = 10
     extension = ".ts"
-    _m3u8_data = PrivateAttr()
+    _m3u8_data = PrivateAttr(None)
+    _uris: List[str] = PrivateAttr([])
+    _durations: List[float] = PrivateAttr([])
+    _total_duration: float = PrivateAttr(0)
 
     async def make_ready(self):
-        self._m3u8_data = (await self._get_m3u8_cls()).segments
+        if self._m3u8_data is None:
+            self._m3u8_data = (
+                await self._call_once("m3u8", self._get_m3u8_cls)
+            ).segments
+            self._uris = [x.absolute_uri for x in self._m3u8_data]
+            self._durations = [x.duration for x in self._m3u8_data]
+            self._total_duration = math.fsum(self._durations)
         if self.size < 0:
-            self.size = await self._get_m3u8_size()
+            self.size = await self._call_once("size", self._get_m3u8_size)
         return await super().make_ready()
 
     # ===========================================================
     async def _get_m3u8_cls(self):
         async with AioHttpClient().get(url=self.url) as data_:
-            src_raw = await data_.text()
+            src_raw = (await data_.read()).decode("utf-8", "replace")
         return m3u8.loads(src_raw, uri=self.url.__str__())
 
     async def _get_m3u8_size(self):
         src_list = self._m3u8_data
-        samples = (
-            random.sample(src_list, self.SIZE_ESTIMATE_SAMPLE)
-            if len(src_list) > self.SIZE_ESTIMATE_SAMPLE
-            else src_list
-        )
+        if not src_list:
+            return 0
+        if all([x.byterange for x in src_list]):
+            return sum([int(x.byterange.split("@")[0]) for x in src_list])
+        samples = sorted({0, len(src_list) - 1})
         size = []
         cl_ = AioHttpClient()
         async for c_, req in cl_.head_many(
-            urls=[x.absolute_uri for x in samples], allow_redirects=True
+            urls=[self._uris[x] for x in samples], allow_redirects=True
         ):
-            size.append(req.content_length / samples[c_].duration)
-        size = mean(size) * sum([x.duration for x in src_list])
+            size.append(req.content_length / self._durations[samples[c_]])
+        size = mean(size) * self._total_duration
         return int(size)
 
     async def _download(
         self, save_path: Path, download_dir: PathOrStr, update_fn=None
     ):
         async with Aria2Client().with_download_many(
-            urls=[x.absolute_uri for x in self._m3u8_data],
+            urls=self._uris,
             update_fn=update_fn,
             save_dir=download_dir,
         ) as dl_:
             dl_files = await Aria2Client().status(dl_, ["files"])
-            dl_files = [Path(x["files"][0]["path"]).name for x in dl_files]
-            async with aiofiles.open(save_path, "wb") as f_w:
-                for d_ in dl_files:
-                    async with aiofiles.open(download_dir / d_, "rb") as f_r:
-                        await f_w.write(await f_r.read())
+            dl_files = [
+                download_dir / Path(x["files"][0]["path"]).name
+                for x in dl_files
+            ]
+            if not await self._concat_ffmpeg(dl_files, save_path):
+                await self._concat(dl_files, save_path)
+
+    @staticmethod
+    async def _concat(files: List[Path], save_path: Path):
+        async with aiofiles.open(save_path, "wb") as f_w:
+            for d_ in files:
+                async with aiofiles.open(d_, "rb") as f_r:
+                    while chunk_ := await f_r.read(
+                        Settings.DOWNLOADER_IO_CHUNK
+                    ):
+                        await f_w.write(chunk_)
+
+    @staticmethod
+    async def _concat_ffmpeg(files: List[Path], save_path: Path) -> bool:
+        ffmpeg_ = shutil.which("ffmpeg")
+        if not ffmpeg_ or not files:
+            return False
+        list_path = files[0].parent / "concat.txt"
+        list_path.write_text(
+            "".join(
+                "file '{}'\n".format(str(x.resolve()).replace("'", "'\\''"))
+                for x in files
+            )
+        )
+        proc_ = await asyncio.create_subprocess_exec(
+            ffmpeg_,
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(list_path),
+            "-c",
+            "copy",
+            str(save_path),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, err_ = await proc_.communicate()
+        if proc_.returncode != 0:
+            logger.warning(f"ffmpeg concat failed: {err_.decode().strip()}")
+            return False
+        return True
 
 
 class BAClientResult(BaseModel):
@@ -162,9 +226,9 @@ class BAClientResult(BaseModel):
 
     def save(self):
         with (Settings.DOWNLOADER_SAVE_PATH / self.hash).open("wb") as f_:
-            dill.dump(self, f_)
+            pickle.dump(self, f_, protocol=5)
 
     @classmethod
     def load(cls, hash_str: str):
         with (Settings.DOWNLOADER_SAVE_PATH / hash_str).open("rb") as f_:
-            return dill.load(f_)
+            return pickle.load(f_)
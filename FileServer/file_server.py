@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import urllib.parse
 from ctypes import Union
 from pathlib import Path
@@ -26,6 +27,7 @@ class FileObj:
     def __init__(self, user_id, user_data):
         self.user_id = user_id
         self.user_data = user_data
+        self._abs_link_prefix = self._get_abs_link(self.user_local_id, "")
 
     async def save_file(self, file: Path):
         write_path = self.abs_path(file.name)
@@ -33,28 +35,34 @@ class FileObj:
         return self.abs_link(file.name)
 
     def get_file(self, file_name, human_readable=True) -> FileResultType:
-        data_ = {
-            "name": file_name,
-            "path": self.abs_path(file_name),
-            "url": self.abs_link(file_name),
-        }
-        state_ = data_["path"].stat()
-        size_ = state_.st_size * 1024
-        if human_readable:
-            size_ = size_hr(size_)
-        data_["size"] = size_
-        data_["created"] = state_.st_ctime
-        return FileResultType(**data_)
+        path_ = self.abs_path(file_name)
+        return self._file_result(
+            file_name, path_, path_.stat(), human_readable
+        )
 
     def list_files(self, human_readable=True) -> List[FileResultType]:
-        file_list = []
-        for f_ in self.abs_dir.iterdir():
-            if not f_.is_file():
-                continue
-            file_list.append(
-                self.get_file(f_.name, human_readable=human_readable)
-            )
-        return file_list
+        with os.scandir(self.abs_dir) as dir_:
+            return [
+                self._file_result(
+                    f_.name, Path(f_.path), f_.stat(), human_readable
+                )
+                for f_ in dir_
+                if f_.is_file()
+            ]
+
+    def _file_result(
+        self, file_name, path: Path, state: os.stat_result, human_readable
+    ) -> FileResultType:
+        size_ = state.st_size
+        if human_readable:
+            size_ = size_hr(size_)
+        return FileResultType(
+            name=file_name,
+            path=path,
+            url=self.abs_link(file_name),
+            size=size_,
+            created=state.st_ctime,
+        )
 
     def del_file(self, file_name):
         u_ = self.abs_path(file_name)
@@ -74,8 +82,7 @@ class FileObj:
         return u_ / file_name
 
     def abs_link(self, file_name):
-        u_ = self.user_local_id
-        return self._get_abs_link(u_, file_name)
+        return self._abs_link_prefix + urllib.parse.quote(file_name)
 
     @staticmethod
     def _get_abs_dir(uid: str):
@@ -1,4 +1,5 @@
 import asyncio
+from typing import Optional
 
 import FastTelethonhelper
 from telethon.client import TelegramClient
@@ -13,6 +14,8 @@ logger = get_logger(__name__)
 
 class TeleDriveClient:
     STORAGE_ENTITY = Settings.BOT_STORAGE
+    _client: Optional[TelegramClient] = None
+    _client_lock: Optional[asyncio.Lock] = None
 
     @property
     def configuration_data(self):
@@ -38,30 +41,38 @@ class TeleDriveClient:
         cl_ = TelegramClient(**self.configuration_data)
         return cl_
 
+    async def _get_client(self) -> TelegramClient:
+        cls_ = type(self)
+        if cls_._client_lock is None:
+            cls_._client_lock = asyncio.Lock()
+        async with cls_._client_lock:
+            if cls_._client is None:
+                cls_._client = self.tg_client
+            if not cls_._client.is_connected():
+                await cls_._client.start()
+        return cls_._client
+
+    @classmethod
+    async def aclose(cls):
+        if cls._client is not None:
+            await cls._client.disconnect()
+            cls._client = None
+
     @call_log(logger)
     async def upload(self, file_path):
-        client_ = self.tg_client
-        async with client_:
-            uploaded = await FastTelethonhelper.fast_upload(client_, file_path)
-            res_ = await client_.send_message(
-                self.STORAGE_ENTITY, file=uploaded
-            )
+        client_ = await self._get_client()
+        uploaded = await FastTelethonhelper.fast_upload(client_, file_path)
+        res_ = await client_.send_message(self.STORAGE_ENTITY, file=uploaded)
         return res_
 
     @call_log(logger)
     async def download(self, msg_id, dir_path):
         dir_path = dir_path if dir_path.endswith("/") else f"{dir_path}/"
-        client_ = self.tg_client
-        async with client_:
-            msg_ = client_.iter_messages(
-                entity=self.STORAGE_ENTITY,
-                min_id=msg_id - 1,
-                max_id=msg_id + 1,
-            )
-            async for m_ in msg_:
-                res_ = await FastTelethonhelper.fast_download(
-                    client_, m_, download_folder=dir_path
-                )
+        client_ = await self._get_client()
+        msg_ = await client_.get_messages(self.STORAGE_ENTITY, ids=msg_id)
+        res_ = await FastTelethonhelper.fast_download(
+            client_, msg_, download_folder=dir_path
+        )
         return res_
 
     @classmethod
@@ -72,6 +83,3 @@ class TeleDriveClient:
             client_ = cls().tg_client
             async with client_:
                 pass
-
-
-asyncio.get_event_loop().run_until_complete(TeleDriveClient.create_session())
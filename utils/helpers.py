@@ -1,26 +1,46 @@
 import asyncio
+import errno
+import fcntl
+import os
 import shutil
-from typing import Callable
+import threading
+from typing import Callable, Dict, List
 
-from utils.types import PathOrStr
+from utils.types import PathOrStr, pathorstr_2_path
+
+FICLONE = 0x40049409
+SIZE_UNITS = ("", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi", "Yi")
 
 
 class AutoCallMixin(object):
+    _auto_call_fns: Dict[str, List[Callable]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._auto_call_fns = {}
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._context = {}
 
-    async def async_auto_call(self, prefix: str, assign: True):
-        fn_name_list = [x for x in dir(self) if x.startswith(prefix)]
-        fn_name_list = sorted(
-            fn_name_list, key=lambda x: int(x.rsplit("__", 1)[-1])
-        )
-        for fn_name in fn_name_list:
-            fn: Callable = getattr(self, fn_name)
-            self._context.update(await fn())
+    async def async_auto_call(self, prefix: str, assign: bool = True):
+        for fn in self._get_auto_call_fns(prefix):
+            self._context.update(await fn(self))
         if assign:
             self.assign_from_context()
 
+    @classmethod
+    def _get_auto_call_fns(cls, prefix: str) -> List[Callable]:
+        if prefix not in cls._auto_call_fns:
+            fn_name_list = [x for x in dir(cls) if x.startswith(prefix)]
+            fn_name_list = sorted(
+                fn_name_list, key=lambda x: int(x.rsplit("__", 1)[-1])
+            )
+            cls._auto_call_fns[prefix] = [
+                getattr(cls, x) for x in fn_name_list
+            ]
+        return cls._auto_call_fns[prefix]
+
     def assign_from_context(self):
         for context_key, context_val in self._context.items():
             setattr(self, context_key, context_val)
@@ -28,29 +48,71 @@ class AutoCallMixin(object):
 
 class Singleton(type):
     _instances = {}
+    _lock = threading.RLock()
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(
-                *args, **kwargs
-            )
-        return cls._instances[cls]
+        instance_ = cls._instances.get(cls)
+        if instance_ is None:
+            with cls._lock:
+                instance_ = cls._instances.get(cls)
+                if instance_ is None:
+                    instance_ = super(Singleton, cls).__call__(*args, **kwargs)
+                    cls._instances[cls] = instance_
+        return instance_
 
 
 def size_hr(val, suffix="B"):
-    for unit in ["", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"]:
-        if abs(val) < 1024.0:
-            return f"{val:3.1f}{unit}{suffix}"
-        val /= 1024.0
-    return f"{val:.1f}Yi{suffix}"
+    exp_ = min(len(SIZE_UNITS) - 1, (int(abs(val)).bit_length() - 1) // 10)
+    exp_ = max(0, exp_)
+    return f"{val / (1 << (10 * exp_)):3.1f}{SIZE_UNITS[exp_]}{suffix}"
 
 
 async def async_move_file(src: PathOrStr, target: PathOrStr):
-    await asyncio.to_thread(shutil.move, src, target)
+    await asyncio.to_thread(move_file, src, target)
+
+
+def move_file(src: PathOrStr, target: PathOrStr):
+    src = pathorstr_2_path(src)
+    target = pathorstr_2_path(target)
+    if target.is_dir():
+        target /= src.name
+    try:
+        os.rename(src, target)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    for copy_fn in (_reflink_file, _kernel_copy_file):
+        try:
+            copy_fn(src, target)
+            if target.stat().st_size != src.stat().st_size:
+                raise OSError(errno.EIO, "incomplete copy", str(target))
+        except OSError:
+            target.unlink(missing_ok=True)
+            continue
+        src.unlink()
+        return
+    shutil.move(src, target)
+
+
+def _reflink_file(src: PathOrStr, target: PathOrStr):
+    with open(src, "rb") as f_r, open(target, "wb") as f_w:
+        fcntl.ioctl(f_w.fileno(), FICLONE, f_r.fileno())
+    shutil.copystat(src, target)
+
+
+def _kernel_copy_file(src: PathOrStr, target: PathOrStr):
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    with open(src, "rb") as f_r, open(target, "wb") as f_w:
+        remaining = os.fstat(f_r.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(f_r.fileno(), f_w.fileno(), remaining)
+            if not copied:
+                raise OSError(errno.EIO, "copy_file_range stopped early")
+            remaining -= copied
+    shutil.copystat(src, target)
 
 
 def stripe_www(host: str):
-    www = "www."
-    if host.startswith("www."):
-        host = host[len(www) :]
-    return host
+    return host.removeprefix("www.")
@@ -7,13 +7,9 @@ URLOrStr = Union[str, URL]
 PathOrStr = Union[str, Path]
 
 
-def urlorstr_2_url(val: URLOrStr):
-    if isinstance(val, str):
-        val = URL(val)
-    return val
+def urlorstr_2_url(val: URLOrStr) -> URL:
+    return val if isinstance(val, URL) else URL(val)
 
 
-def pathorstr_2_path(val: PathOrStr):
-    if isinstance(val, str):
-        val = Path(val)
-    return val
+def pathorstr_2_path(val: PathOrStr) -> Path:
+    return val if isinstance(val, Path) else Path(val)